@@ -1,5 +1,8 @@
 
+import numbers
+import unicodedata
 from typing import Dict, List, Optional
+import numpy as np
 from paddlenlp.transformers import PretrainedTokenizer
 from paddlenlp.utils.log import logger
 
@@ -37,6 +40,17 @@ SPECIAL_CODEPOINTS_BY_NAME: Dict[str, int] = {
     name: codepoint for codepoint, name in SPECIAL_CODEPOINTS.items()
 }
 
+# Special codepoints as an array, for vectorized membership tests.
+SPECIAL_CODEPOINT_IDS = np.array(list(SPECIAL_CODEPOINTS), dtype=np.int64)
+
+
+def _is_integral(value):
+    """Whether `value` is a number with an integral value, e.g. `2` or `2.0`."""
+    try:
+        return float(value).is_integer()
+    except (TypeError, ValueError):
+        return False
+
 
 class CanineTokenizer(PretrainedTokenizer):
     r"""
@@ -69,6 +83,9 @@ class CanineTokenizer(PretrainedTokenizer):
             32, 98, 111, 120, 32, 111, 102, 32, 99, 104, 111, 99, 111, 108, 97, 116, 101, 115, 46, 57345],
             'token_type_ids': [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
             0, 0, 0, 0, 0, 0, 0, 0, 0, 0]}
+
+            # Unicode normalization is opt-in, e.g. to map "e\u0301" and "\u00e9" to the same id:
+            inputs = tokenizer(text, normalize="NFC")
     """
     pretrained_init_configuration = {
         "canine-s": {"model_max_length": 2048},
@@ -91,6 +108,9 @@ class CanineTokenizer(PretrainedTokenizer):
 
         self._unicode_vocab_size = UNICODE_VOCAB_SIZE
         self._num_special_tokens = len(self._special_codepoints)
+        # Plain ints, so building inputs does not look up the token ids per call.
+        self._cls_id = ord(str(cls_token))
+        self._sep_id = ord(str(sep_token))
 
     @property
     def vocab_size(self):
@@ -101,16 +121,76 @@ class CanineTokenizer(PretrainedTokenizer):
         """
         return self._unicode_vocab_size
 
-    def _tokenize(self, text, **kwargs):
+    @staticmethod
+    def normalize_text(text, normalize=None):
+        r"""
+        Applies an optional Unicode normalization, so that visually identical
+        inputs are mapped to the same code points.
+        Args:
+            text (str): The text to be normalized.
+            normalize (str, optional): One of "NFC", "NFD", "NFKC" or "NFKD".
+                Default: None, which returns the text unchanged.
+
+        Returns:
+            str: The normalized text.
+        """
+        # The quick check skips the decompose/compose pass for normalized text.
+        if normalize is None or unicodedata.is_normalized(normalize, text):
+            return text
+        return unicodedata.normalize(normalize, text)
+
+    def _tokenize(self, text, normalize=None, **kwargs):
         r"""
         Tokenization for Canine models, which is simple character splitting.
         Args:
             text (str): The text to be tokenized.
+            normalize (str, optional): Unicode normalization form applied before
+                splitting, see `normalize_text`. Default: None.
 
         Returns:
             List[str]: A list of string representing converted tokens.
         """
-        return list(text)
+        return list(self.normalize_text(text, normalize))
+
+    def encode_codepoints(self, text, normalize=None):
+        r"""
+        Converts a whole string into its Unicode code points in a single pass.
+        Args:
+            text (str): The text to be converted.
+            normalize (str, optional): Unicode normalization form applied before
+                conversion, see `normalize_text`. Default: None.
+
+        Returns:
+            np.ndarray: An int32 array holding one code point per character.
+        """
+        text = self.normalize_text(text, normalize)
+        return np.frombuffer(
+            text.encode("utf-32-le", errors="surrogatepass"), dtype=np.int32)
+
+    def convert_tokens_to_ids(self, tokens):
+        """
+        Converts a single token or a sequence of tokens to code points. Sequences of
+        single characters (e.g. the output of `tokenize`) are re-joined and converted
+        through `encode_codepoints` instead of calling `ord()` per token.
+
+        Args:
+            tokens (str|List[str]): One or several tokens.
+
+        Returns:
+            int|List[int]: The converted code point(s).
+        """
+        if (tokens is None or isinstance(tokens, str) or self.added_tokens_encoder or
+                not isinstance(tokens, (list, tuple))):
+            return super().convert_tokens_to_ids(tokens)
+        try:
+            text = "".join(tokens)
+        except TypeError:
+            # Non-string tokens, let `_convert_token_to_id` reject them.
+            return super().convert_tokens_to_ids(tokens)
+        if len(text) != len(tokens):
+            # Multi-character or empty tokens, let `_convert_token_to_id` reject them.
+            return super().convert_tokens_to_ids(tokens)
+        return self.encode_codepoints(text).tolist()
 
     def _convert_token_to_id(self, token):
         try:
@@ -126,6 +206,44 @@ class CanineTokenizer(PretrainedTokenizer):
         except TypeError:
             raise ValueError(f"invalid id: {index}")
 
+    def convert_ids_to_tokens(self, ids, skip_special_tokens=False):
+        """
+        Converts a single code point or a sequence of code points to tokens. Sequences
+        are decoded in one UTF-32 pass and special code points are then replaced by
+        their names, instead of calling `_convert_id_to_token` per id.
+
+        Args:
+            ids (int|List[int]): One or several code points.
+            skip_special_tokens (bool): Whether to drop special tokens. Default: False.
+
+        Returns:
+            str|List[str]: The converted token(s).
+        """
+        if isinstance(ids, (numbers.Number, np.generic)) or (
+                hasattr(ids, "__array__") and np.ndim(ids) == 0):
+            # Also covers numpy and paddle scalars, returned as a single token.
+            if np.asarray(ids).dtype.kind in "iu":
+                return super().convert_ids_to_tokens(int(ids), skip_special_tokens)
+            return self._convert_id_to_token(ids)
+        is_sequence = isinstance(ids, (list, tuple)) or hasattr(ids, "__array__")
+        if (skip_special_tokens or self.added_tokens_decoder or not is_sequence or
+                np.ndim(ids) != 1):
+            # Generators and other iterables, nested sequences, special cases.
+            return super().convert_ids_to_tokens(ids, skip_special_tokens)
+        ids = np.asarray(ids)
+        if ids.size and ids.dtype.kind not in "iu":
+            for index in ids.tolist():
+                if not _is_integral(index):
+                    raise ValueError(f"invalid id: {index}")
+        ids = ids.astype(np.int64)
+        out_of_range = ids[(ids < 0) | (ids >= UNICODE_VOCAB_SIZE)]
+        if out_of_range.size:
+            raise ValueError(f"invalid id: {out_of_range[0]}")
+        tokens = list(ids.astype("<u4").tobytes().decode("utf-32-le", errors="surrogatepass"))
+        for i in np.flatnonzero(np.isin(ids, SPECIAL_CODEPOINT_IDS)):
+            tokens[i] = SPECIAL_CODEPOINTS[int(ids[i])]
+        return tokens
+
     def convert_tokens_to_string(self, tokens):
         """
         Converts a sequence of tokens (list of string) to a single string by
@@ -141,7 +259,7 @@ class CanineTokenizer(PretrainedTokenizer):
 
     def tokenize(self, text, **kwargs):
         """ End-to-end tokenization for Canine models. """
-        return self._tokenize(text)
+        return self._tokenize(text, **kwargs)
 
     def build_inputs_with_special_tokens(
             self, token_ids_0: List[int],
@@ -159,11 +277,9 @@ class CanineTokenizer(PretrainedTokenizer):
         Returns:
             `List[int]`: The model input with special tokens.
         """
-        sep = [self.sep_token_id]
-        cls = [self.cls_token_id]
         if token_ids_1 is None:
-            return cls + token_ids_0 + sep
-        return cls + token_ids_0 + sep + token_ids_1 + sep
+            return [self._cls_id, *token_ids_0, self._sep_id]
+        return [self._cls_id, *token_ids_0, self._sep_id, *token_ids_1, self._sep_id]
 
     def get_special_tokens_mask(
             self,
@@ -189,9 +305,14 @@ class CanineTokenizer(PretrainedTokenizer):
             return super().get_special_tokens_mask(
                 token_ids_0=token_ids_0, token_ids_1=token_ids_1, already_has_special_tokens=True
             )
+        # Allocate the mask once and only flip the special token positions.
         if token_ids_1 is None:
-            return [1] + ([0] * len(token_ids_0)) + [1]
-        return [1] + ([0] * len(token_ids_0)) + [1] + ([0] * len(token_ids_1)) + [1]
+            mask = [0] * (len(token_ids_0) + 2)
+        else:
+            mask = [0] * (len(token_ids_0) + len(token_ids_1) + 3)
+            mask[len(token_ids_0) + 1] = 1
+        mask[0] = mask[-1] = 1
+        return mask
 
     def create_token_type_ids_from_sequences(
             self, token_ids_0: List[int],
@@ -209,11 +330,9 @@ class CanineTokenizer(PretrainedTokenizer):
         Returns:
             `List[int]`: The token type ids.
         """
-        sep = [self.sep_token_id]
-        cls = [self.cls_token_id]
         if token_ids_1 is None:
-            return len(cls + token_ids_0 + sep) * [0]
-        return [0] * len(cls + token_ids_0 + sep) + [1] * len(token_ids_1 + sep)
+            return [0] * (len(token_ids_0) + 2)
+        return [0] * (len(token_ids_0) + 2) + [1] * (len(token_ids_1) + 1)
 
     @staticmethod
     def save_vocabulary(filepath, vocab):
@@ -0,0 +1,71 @@
+import numpy as np
+
+from tydi_canine import postproc
+
+
+def reference_best_span(start_logits, end_logits, cls_token_score, start_indexes,
+                        end_indexes, max_answer_length):
+    """The nested loop of the original `compute_predictions`: the first pair
+    with the highest `float(start + end - cls)` wins."""
+    best = None
+    for start_index in start_indexes:
+        for end_index in end_indexes:
+            if end_index < start_index:
+                continue
+            if end_index - start_index + 1 > max_answer_length:
+                continue
+            minimal_span_score = start_logits[start_index] + end_logits[end_index]
+            score = float(minimal_span_score - cls_token_score)
+            if best is None or score > best[0]:
+                best = (score, start_index, end_index)
+    return best if best is not None else (-np.inf, -1, -1)
+
+
+def ulp_tie_case(seq_length=64, max_answer_length=5):
+    """Two spans whose float32 sums differ by one ulp (3.1999998 < 3.2) but tie
+    once the [CLS] score of -1.0 is subtracted; the first one must win."""
+    start_logits = np.zeros(seq_length, dtype="float32")
+    end_logits = np.zeros(seq_length, dtype="float32")
+    start_logits[0] = end_logits[0] = -0.5
+    start_logits[10], end_logits[12] = 0.6, 2.6
+    start_logits[20], end_logits[22] = 0.5, 2.7
+    return start_logits, end_logits, max_answer_length
+
+
+def run_check(num_trials=1000, seq_length=512, n_best_size=20, max_answer_length=30):
+    kernels = {"numpy": postproc._best_span_numpy}
+    if postproc.njit is not None:
+        kernels["numba"] = postproc.njit(cache=True)(postproc._best_span_loop)
+    else:
+        print(">>> numba is not installed, only checking the numpy kernel")
+    rng = np.random.default_rng(0)
+    mismatches = dict.fromkeys(kernels, 0)
+    print(">>> running best span kernel check")
+    for trial in range(num_trials):
+        if trial == 0:
+            start_logits, end_logits, trial_max_answer_length = ulp_tie_case()
+        else:
+            # Rounded float32 logits, so that ties between spans are frequent.
+            start_logits = rng.normal(size=seq_length).round(1).astype("float32")
+            end_logits = rng.normal(size=seq_length).round(1).astype("float32")
+            trial_max_answer_length = max_answer_length
+        cls_token_score = start_logits[0] + end_logits[0]
+        start_indexes = np.array(
+            postproc.get_best_indexes(start_logits, n_best_size), dtype=np.int64)
+        end_indexes = np.array(
+            postproc.get_best_indexes(end_logits, n_best_size), dtype=np.int64)
+        args = (start_logits, end_logits, cls_token_score, start_indexes, end_indexes,
+                trial_max_answer_length)
+        expected_score, expected_start, expected_end = reference_best_span(*args)
+        for name, kernel in kernels.items():
+            score, start_index, end_index = kernel(*args)
+            if (start_index, end_index) != (expected_start, expected_end) or \
+                    (start_index != -1 and float(np.float32(score)) != expected_score):
+                mismatches[name] += 1
+    for name, count in mismatches.items():
+        print(f"{name} kernel matched original loop? {count == 0} "
+              f"({count}/{num_trials} mismatches)")
+
+
+if __name__ == '__main__':
+    run_check()
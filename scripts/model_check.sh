@@ -1,2 +1,3 @@
 python -m reproduction_utils.token_check
-python -m reproduction_utils.forward_ppg_check
\ No newline at end of file
+python -m reproduction_utils.forward_ppg_check
+python -m reproduction_utils.postproc_check
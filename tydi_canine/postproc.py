@@ -19,45 +19,176 @@ This module has only light dependencies on Tensorflow (5-10 lines in
 
 import collections
 import json
+import mmap
 import multiprocessing
 import logging
-from functools import partial
-import sys
+import os
+import time
+from typing import Any, Dict, List, Optional
+from functools import partial, reduce
+from multiprocessing.shared_memory import SharedMemory
 from tydi_canine import data
 import numpy as np
-from tqdm import tqdm
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, fall back to the NumPy kernel.
+    njit = None
+
+try:
+    # orjson is optional; it parses `bytes` directly and is several times faster.
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# Lower-cased language names by `data.Language` value.
+_LANGUAGE_NAMES = {language.value: language.name.lower() for language in data.Language}
+
 
 class ScoreSummary(object):
+    __slots__ = ("predicted_label", "minimal_span_score", "cls_token_score",
+                 "answer_type_logits")
+
     def __init__(self):
-        self.predicted_label = None
-        self.minimal_span_score = None
-        self.cls_token_score = None
-        self.answer_type_logits = None
+        self.predicted_label: Optional[Dict[str, Any]] = None
+        self.minimal_span_score: Optional[float] = None
+        self.cls_token_score: Optional[float] = None
+        self.answer_type_logits: Optional[np.ndarray] = None
 
 
 def read_candidates_from_one_split(file_obj):
-    """Read candidates from a single jsonl file."""
+    """Read candidates from a single jsonl file, opened in text or binary mode."""
     candidates_dict = {}
     for line in file_obj:
-        json_dict = json.loads(line)
+        json_dict = json_loads(line)
         candidates_dict[
             json_dict["example_id"]] = json_dict["passage_answer_candidates"]
     return candidates_dict
 
 
+def _read_candidates_from_range(path, begin, end):
+    """Read candidates from the lines in bytes `[begin, end)` of a jsonl file.
+  Returns the candidates dictionary and the number of lines read."""
+    with open(path, "rb") as file_obj, \
+            mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        lines = [line for line in mm[begin:end].splitlines() if line.strip()]
+    return read_candidates_from_one_split(lines), len(lines)
+
+
+def read_candidates_from_file(path, num_workers=None):
+    """Read candidates from an uncompressed jsonl file, parsing in parallel.
+  The file is memory-mapped and split into `num_workers` byte ranges aligned
+  on line boundaries, each of which is parsed by a separate process.
+  Args:
+    path: Path of the jsonl file.
+    num_workers: Number of parsing processes, defaults to the CPU count.
+  Returns:
+    A dictionary mapping `example_id` to its passage answer candidates.
+  """
+    num_workers = num_workers or multiprocessing.cpu_count()
+    size = os.path.getsize(path)
+    if size == 0:
+        return {}
+    bounds = [0]
+    with open(path, "rb") as file_obj, \
+            mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for i in range(1, num_workers):
+            newline = mm.find(b"\n", max(size * i // num_workers, bounds[-1]))
+            if newline == -1:
+                break
+            bounds.append(newline + 1)
+    bounds.append(size)
+    ranges = [(path, begin, end) for begin, end in zip(bounds, bounds[1:]) if end > begin]
+
+    if len(ranges) == 1:
+        candidates_dict, count = _read_candidates_from_range(*ranges[0])
+    else:
+        candidates_dict, count = {}, 0
+        with multiprocessing.Pool(processes=len(ranges)) as pool:
+            for range_candidates, range_count in pool.starmap(
+                    _read_candidates_from_range, ranges):
+                candidates_dict.update(range_candidates)
+                count += range_count
+    # Duplicated example ids would silently overwrite each other.
+    assert count == len(candidates_dict), "load prediction candidates failed"
+    return candidates_dict
+
+
 def get_best_indexes(logits, n_best_size):
     """Get the n-best logits from a list."""
-    index_and_score = sorted(
-        enumerate(logits[1:], 1), key=lambda x: x[1], reverse=True)
-    best_indexes = []
-    for i in range(len(index_and_score)):
-        if i >= n_best_size:
-            break
-        best_indexes.append(index_and_score[i][0])
-    return best_indexes
+    logits = np.asarray(logits)[1:]
+    n_best_size = min(n_best_size, logits.size)
+    if n_best_size <= 0:
+        return []
+    # Keep every logit reaching the n-th best value (ties included) in index
+    # order, then stable-sort only those, so ties favour the lowest indexes.
+    threshold = np.partition(logits, -n_best_size)[-n_best_size]
+    best_indexes = np.flatnonzero(logits >= threshold)
+    best_indexes = best_indexes[np.argsort(-logits[best_indexes], kind="stable")]
+    return (best_indexes[:n_best_size] + 1).tolist()
+
+
+def _best_span_loop(start_logits, end_logits, cls_token_score, start_indexes,
+                    end_indexes, max_answer_length):
+    """Finds the best valid (start, end) pair, compiled by numba when available.
+    Indexes pointing at dummy tokens are expected to be filtered out already.
+
+    Pairs are compared on `start + end - cls_token_score`, computed as in the
+    original nested loop, so that sums which only tie after subtracting the
+    [CLS] score still resolve to the first pair.
+
+    Returns:
+      A tuple `(score, start_index, end_index)`; the indexes are -1 if no
+      valid span exists.
+    """
+    best_score = -np.inf
+    best_start = -1
+    best_end = -1
+    for start_index in start_indexes:
+        for end_index in end_indexes:
+            if end_index < start_index:
+                continue
+            if end_index - start_index + 1 > max_answer_length:
+                continue
+            # Span logits minus the [CLS] logits seems to be close to the best.
+            score = start_logits[start_index] + end_logits[end_index] - cls_token_score
+            if score > best_score:
+                best_score, best_start, best_end = score, start_index, end_index
+    return best_score, best_start, best_end
+
+
+def _best_span_numpy(start_logits, end_logits, cls_token_score, start_indexes,
+                     end_indexes, max_answer_length):
+    """Same as `_best_span_loop`, scoring all pairs with NumPy broadcasting."""
+    # Rows are start indexes, so ties resolve in the same order as the loop.
+    starts, ends = np.meshgrid(start_indexes, end_indexes, indexing="ij")
+    valid = (ends >= starts) & (ends - starts + 1 <= max_answer_length)
+    if not valid.any():
+        return -np.inf, -1, -1
+    span_scores = np.where(
+        valid, start_logits[starts] + end_logits[ends] - cls_token_score, -np.inf)
+    best = np.unravel_index(np.argmax(span_scores), span_scores.shape)
+    return span_scores[best], starts[best], ends[best]
+
+
+if njit is not None:
+    _best_span_kernel = njit(cache=True)(_best_span_loop)
+else:
+    _best_span_kernel = _best_span_numpy
+
+
+def best_span(start_logits, end_logits, cls_token_score, start_indexes,
+              end_indexes, max_answer_length):
+    """Runs the best-span kernel, returning the span score minus `cls_token_score`
+    in the dtype of the logits whichever kernel is used (numba widens it to
+    float64)."""
+    score, start_index, end_index = _best_span_kernel(
+        start_logits, end_logits, cls_token_score, start_indexes, end_indexes,
+        max_answer_length)
+    score_type = np.result_type(start_logits, end_logits, cls_token_score).type
+    return score_type(score), int(start_index), int(end_index)
 
 
 # IMPROVE ME (PULL REQUESTS WELCOME): This takes more than half the runtime and
@@ -75,7 +206,10 @@ def compute_predictions(eval_example, candidate_beam, max_answer_length):
     A `ScoreSummary` or `None` if no passage prediction could be found.
   """
 
-    predictions = []
+    # Running best span over all features; only the argmax is kept.
+    best_score = best_start_offset = best_end_offset = None
+    best_language_name = best_result = None
+    best_minimal_span_score = best_cls_token_score = None
     n_best_size = candidate_beam
 
     if not eval_example.results:
@@ -91,62 +225,58 @@ def compute_predictions(eval_example, candidate_beam, max_answer_length):
         if unique_id not in eval_example.features:
             logging.warning("No feature found with unique_id: %s", unique_id)
             return None
-        result_start_logits = result["start_logits"]
-        result_end_logits = result["end_logits"]
+        result_start_logits = np.asarray(result["start_logits"])
+        result_end_logits = np.asarray(result["end_logits"])
 
-        wp_start_offset = (
+        wp_start_offset = np.asarray(
             eval_example.features[unique_id]["wp_start_offset"])
-        wp_end_offset = (
+        wp_end_offset = np.asarray(
             eval_example.features[unique_id]["wp_end_offset"])
         language_id = (
             eval_example.features[unique_id]["language_id"][0])
-        language_name = data.Language(language_id).name.lower()
-        start_indexes = get_best_indexes(result_start_logits, n_best_size)
-        end_indexes = get_best_indexes(result_end_logits, n_best_size)
+        language_name = _LANGUAGE_NAMES[language_id]
+        start_indexes = np.array(
+            get_best_indexes(result_start_logits, n_best_size), dtype=np.int64)
+        end_indexes = np.array(
+            get_best_indexes(result_end_logits, n_best_size), dtype=np.int64)
+        # Drop indexes of dummy tokens (like separators), their offsets are -1.
+        start_indexes = start_indexes[wp_start_offset[start_indexes] != -1]
+        end_indexes = end_indexes[wp_end_offset[end_indexes] != -1]
         cls_token_score = result_start_logits[0] + result_end_logits[0]
-        for start_index in start_indexes:
-            for end_index in end_indexes:
-                if end_index < start_index:
-                    continue
-                # This means these are dummy tokens (like separators).
-                if wp_start_offset[start_index] == -1:
-                    continue
-                if wp_end_offset[end_index] == -1:
-                    continue
-                length = end_index - start_index + 1
-                if length > max_answer_length:
-                    continue
-                summary = ScoreSummary()
-                summary.minimal_span_score = (
-                        result_start_logits[start_index] +
-                        result_end_logits[end_index])
-                summary.cls_token_score = cls_token_score
-                summary.answer_type_logits = result["answer_type_logits"]
-
-                start_offset = wp_start_offset[start_index]
-                end_offset = wp_end_offset[end_index] + 1
-
-                # Span logits minus the [CLS] logits seems to be close to the best.
-                score = summary.minimal_span_score - summary.cls_token_score
-                predictions.append(
-                    (float(score), summary, language_name, int(start_offset), int(end_offset)))
-
-    if not predictions:
+        # Only the best span of each feature can be the best of the example.
+        score, start_index, end_index = best_span(
+            result_start_logits, result_end_logits, cls_token_score,
+            start_indexes, end_indexes, max_answer_length)
+        if start_index == -1:
+            continue
+
+        score = float(score)
+        if best_score is None or score > best_score:
+            minimal_span_score = (
+                result_start_logits[start_index] + result_end_logits[end_index])
+            best_score = score
+            best_start_offset = int(wp_start_offset[start_index])
+            best_end_offset = int(wp_end_offset[end_index] + 1)
+            best_language_name = language_name
+            best_result = result
+            best_cls_token_score = cls_token_score
+            best_minimal_span_score = minimal_span_score
+
+    if best_score is None:
         logging.warning("No predictions for eval_example %s",
                         eval_example.example_id)
         return None
 
-    score, summary, language_name, start_span, end_span = max(
-        predictions, key=lambda x: x[0])
-    minimal_span = Span(start_span, end_span)
-    passage_span_index = 0
-    for c_ind, c in enumerate(eval_example.candidates):
-        start = minimal_span.start_byte_offset
-        end = minimal_span.end_byte_offset
-        if c["plaintext_start_byte"] <= start and c["plaintext_end_byte"] >= end:
-            passage_span_index = c_ind
-            break
-    else:
+    score, language_name = best_score, best_language_name
+    summary = ScoreSummary()
+    summary.minimal_span_score = best_minimal_span_score
+    summary.cls_token_score = best_cls_token_score
+    summary.answer_type_logits = best_result["answer_type_logits"]
+    minimal_span = Span(best_start_offset, best_end_offset)
+    passage_span_index = eval_example.find_candidate(
+        minimal_span.start_byte_offset, minimal_span.end_byte_offset)
+    if passage_span_index is None:
+        passage_span_index = 0
         logging.warning("No passage predicted for eval_example %s. Choosing first.",
                         eval_example.example_id)
     summary.predicted_label = {
@@ -169,12 +299,40 @@ Span = collections.namedtuple("Span", ["start_byte_offset", "end_byte_offset"])
 
 class EvalExample(object):
     """Eval data available for a single example."""
+    __slots__ = ("example_id", "candidates", "results", "features",
+                 "_cand_order", "_cand_starts", "_cand_ends", "_cand_disjoint")
 
-    def __init__(self, example_id, candidates):
+    def __init__(self, example_id: int, candidates: List[Dict[str, Any]]):
         self.example_id = example_id
         self.candidates = candidates
-        self.results = {}
-        self.features = {}
+        self.results: Dict[int, Dict[str, Any]] = {}
+        self.features: Dict[int, Dict[str, Any]] = {}
+        # Candidate byte ranges sorted by start byte, for `find_candidate`.
+        self._cand_order = np.argsort(
+            [c["plaintext_start_byte"] for c in candidates], kind="stable")
+        self._cand_starts = np.array(
+            [candidates[i]["plaintext_start_byte"] for i in self._cand_order])
+        self._cand_ends = np.array(
+            [candidates[i]["plaintext_end_byte"] for i in self._cand_order])
+        # Binary search is only exact if each candidate ends before the next one
+        # (in start order) begins; otherwise `find_candidate` scans linearly.
+        self._cand_disjoint = bool(
+            np.all(self._cand_starts[1:] >= self._cand_ends[:-1]))
+
+    def find_candidate(self, start, end):
+        """Returns the index of the first candidate passage containing the byte
+        range `[start, end)`, or `None` if there is none."""
+        if self._cand_disjoint and end > start:
+            # Disjoint candidates: only the last one starting at or before
+            # `start` can contain a non-empty range.
+            i = np.searchsorted(self._cand_starts, start, side="right") - 1
+            if i >= 0 and self._cand_ends[i] >= end:
+                return int(self._cand_order[i])
+            return None
+        for c_ind, c in enumerate(self.candidates):
+            if c["plaintext_start_byte"] <= start and c["plaintext_end_byte"] >= end:
+                return c_ind
+        return None
 
 
 # IMPROVE ME: This function and its children takes more than half the processing
@@ -195,10 +353,10 @@ def compute_pred_dict(candidates_dict, dev_features, raw_results,
         each has a `unique_id`.
       3. Raw results, which are the predictions coming from the execution of the
         neural network graph; each has a `unique_id`.
-      Because of the way `unique_ids` are assigned by `CreateTFExampleFn`,
-      all `unique_ids` associated with an `example_id` should numerically be sorted
-      after that `example_id`. The `for` loop over `datum`s below takes advantage
-      of this in order to merge these three things together.
+      Each feature records the `example_id` owning it (`example_index`), and
+      each raw result shares its `unique_id` with a feature. The examples are
+      kept in a dict keyed by `example_id` and features and results are joined
+      into their owning example with dictionary lookups.
       Finally, with all of these things available together, this function delegates
       to `compute_predictions(...)` to post-process the prediction for each example
       and turn it into the JSON prediction format expected by the eval script.
@@ -212,103 +370,237 @@ def compute_pred_dict(candidates_dict, dev_features, raw_results,
         A dictionary cont``aining predictions.
     """
     logger.info("Post-processing predictions started.")
-    raw_results_by_id = [(int(res["unique_id"] + 1), res) for res in raw_results]
-    # Cast example id to int32 for each example, similarly to the raw results.
-    # sess = tf.Session()
-    all_candidates = candidates_dict.items()
-    example_ids = np.array([int(k) for k, _ in all_candidates
-                            ], dtype="int32")
-    examples_by_id = list(zip(example_ids, all_candidates))
-    if not examples_by_id:
+    if not candidates_dict:
         raise ValueError("No examples candidates found.")
-    feature_ids = []
-    features = []
-    for f in dev_features:
-        feature_ids.append(f["unique_ids"] + 1)
-        features.append(f)
-    # unique_id = (example_index + input_feature.doc_span_index) > example id
-    feature_ids = np.array(feature_ids, dtype="int32")
-    features_by_id = list(zip(feature_ids, features))
-    # Join examples with features and raw results.
-    merged = sorted(
-        examples_by_id + raw_results_by_id + features_by_id,
-        key=lambda pair: pair[0])
+    # Examples are keyed by their `example_id`; features and raw results are
+    # scattered directly into the example that owns them.
+    eval_examples = {
+        int(example_id): EvalExample(example_id=example_id, candidates=candidates)
+        for example_id, candidates in candidates_dict.items()}
 
     # Error counters
     num_failed_matches = 0
-    ex_count = 0
     feature_count = 0
     result_count = 0
-    # `feature_unique_id` is an example ID or an example ID with something
-    # appended on the end of it such that it sorts after the appropriate
-    # example ID (see `convert_examples_to_features`).
-    num_merged = len(merged)
     logger.info("Start Combining results and articles....")
 
-    eval_examples = []
-    for step in range(num_merged):
-        feature_unique_id, datum = merged.pop(0)
-        # if from `examples_by_id`
-        if step % 50000 == 0:
-            logger.info(f">>> step {step}/{num_merged}")
-        if isinstance(datum, tuple):
-            ex_count += 1
-            eval_examples.append(
-                EvalExample(example_id=datum[0], candidates=datum[1]))
-        # if from `features_by_id`
-        elif "wp_start_offset" in datum:
-            feature_count += 1
-            # Join with the example that we just appended above, by
-            # adding to the `EvalExample`'s `features` dict.
-            if not eval_examples:
-                logger.warning("Expected to already have example for this example id. "
-                               "Dataset / predictions mismatch?")
-                num_failed_matches += 1
-                continue
-            assert eval_examples[-1].example_id == datum["example_index"], \
-                f"{eval_examples[-1].example_id} not matched {datum['example_index']} with" \
-                f" unique id {datum['unique id']}"
-            eval_examples[-1].features[feature_unique_id] = datum
-        # if from `raw_results_by_id`
-        else:  # raw rasult
-            result_count += 1
-            # Join with the example that we just appended above, by
-            # adding to the `EvalExample`'s `results` dict.
-            if not eval_examples:
-                logger.warning("Expected to already have example for this example id. "
-                               "Dataset / predictions mismatch?")
-                num_failed_matches += 1
-                continue
-            eval_examples[-1].results[feature_unique_id] = datum
-
-    logger.info("  Num candidate examples found: %d", ex_count)
+    # unique_id = (example_index + input_feature.doc_span_index) > example id
+    # Maps each feature `unique_id` to the `example_id` owning it, so that raw
+    # results (which only carry `unique_id`) can be joined to their example.
+    feature_owners = {}
+    for datum in dev_features:
+        feature_unique_id = int(np.int32(datum["unique_ids"] + 1))
+        example_id = int(datum["example_index"])
+        if example_id not in eval_examples:
+            logger.warning("No example found for example id %s. "
+                           "Dataset / predictions mismatch?", example_id)
+            num_failed_matches += 1
+            continue
+        if feature_unique_id in feature_owners:
+            logger.warning("Duplicate feature unique id %s for example ids %s and %s.",
+                           feature_unique_id, feature_owners[feature_unique_id], example_id)
+            num_failed_matches += 1
+            continue
+        feature_count += 1
+        feature_owners[feature_unique_id] = example_id
+        eval_examples[example_id].features[feature_unique_id] = datum
+
+    for datum in raw_results:
+        feature_unique_id = int(datum["unique_id"] + 1)
+        if feature_unique_id not in feature_owners:
+            logger.warning("No feature found for unique id %s. "
+                           "Dataset / predictions mismatch?", feature_unique_id)
+            num_failed_matches += 1
+            continue
+        owner_results = eval_examples[feature_owners[feature_unique_id]].results
+        if feature_unique_id in owner_results:
+            logger.warning("Duplicate result for unique id %s.", feature_unique_id)
+            num_failed_matches += 1
+            continue
+        result_count += 1
+        owner_results[feature_unique_id] = datum
+
+    logger.info("  Num candidate examples found: %d", len(eval_examples))
     logger.info("  Num candidate features found: %d", feature_count)
     logger.info("  Num results found: %d", result_count)
-    logger.info("  len(merged): %d", num_merged)
     if num_failed_matches > 0:
         logger.warning("  Num failed matches: %d", num_failed_matches)
+    eval_examples = list(eval_examples.values())
+    # Visit features and results in `unique_id` order, whatever the input order,
+    # so that ties between features resolve to the first one.
+    for eval_example in eval_examples:
+        eval_example.features = dict(sorted(eval_example.features.items()))
+        eval_example.results = dict(sorted(eval_example.results.items()))
 
     tydi_pred_dict = {}
-    nbr_parallel_blocks = min(multiprocessing.cpu_count(), 8)
+    nbr_parallel_blocks = multiprocessing.cpu_count()
     construct_func = partial(construct_prediction_object,
                              candidate_beam=candidate_beam,
                              max_answer_length=max_answer_length)
     logger.info(">>> Collecting & formatting Article Answers......")
     total_steps, steps = len(eval_examples), 0
-    with multiprocessing.Pool(processes=nbr_parallel_blocks) as pool:
-        chunk_size = sys.getsizeof(eval_examples[0])
-        for result in pool.imap_unordered(construct_func, eval_examples, chunksize=chunk_size):
-            steps += 1
-            if steps % 1000 == 0:
-                logger.info(f">>> Step {steps}/{total_steps}")
-            if result:
-                tydi_pred_dict[result[0]] = result[1]
+    last_log_time = time.monotonic()
+    shm = None
+    try:
+        # Offsets and logits are moved to shared memory so that only the light
+        # example metadata is pickled to the workers. `shm` is None if the block
+        # cannot be allocated, the full examples are then pickled instead.
+        shm, layout, eval_examples = pack_shared_arrays(eval_examples)
+        pool_kwargs = {}
+        if shm is not None:
+            pool_kwargs = dict(initializer=attach_shared_arrays,
+                               initargs=(shm.name,) + layout)
+        with multiprocessing.Pool(processes=nbr_parallel_blocks, **pool_kwargs) as pool:
+            # Several chunks per worker keeps them balanced when examples differ in
+            # their number of features.
+            chunk_size = max(1, len(eval_examples) // (nbr_parallel_blocks * 16))
+            for result in pool.imap_unordered(construct_func, eval_examples, chunksize=chunk_size):
+                steps += 1
+                # Log progress at most every few seconds, whatever the step rate.
+                now = time.monotonic()
+                if now - last_log_time > 5.0:
+                    logger.info(">>> Step %d/%d", steps, total_steps)
+                    last_log_time = now
+                if result:
+                    tydi_pred_dict[result[0]] = result[1]
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
 
     return tydi_pred_dict
 
 
+# Views on the shared memory block, set in each worker by `attach_shared_arrays`.
+_shared_memory = None
+_shared_arrays = None
+
+
+def _aligned_nbytes(count, dtype):
+    """Byte size of `count` items of `dtype`, rounded up to a multiple of 8."""
+    return -(-count * np.dtype(dtype).itemsize // 8) * 8
+
+
+def _shared_array_views(buffer, num_offsets, offset_dtype, num_logits, logit_dtype):
+    """Returns the `wp_start_offset`, `wp_end_offset`, `start_logits` and
+    `end_logits` arrays laid out one after another in `buffer`."""
+    offset_nbytes = _aligned_nbytes(num_offsets, offset_dtype)
+    logit_nbytes = _aligned_nbytes(num_logits, logit_dtype)
+    wp_start_offset = np.ndarray((num_offsets,), offset_dtype, buffer, 0)
+    wp_end_offset = np.ndarray((num_offsets,), offset_dtype, buffer, offset_nbytes)
+    start_logits = np.ndarray((num_logits,), logit_dtype, buffer, 2 * offset_nbytes)
+    end_logits = np.ndarray(
+        (num_logits,), logit_dtype, buffer, 2 * offset_nbytes + logit_nbytes)
+    return wp_start_offset, wp_end_offset, start_logits, end_logits
+
+
+def _shared_memory_fits(nbytes):
+    """Whether `/dev/shm`, where it exists, has room for `nbytes`. Writing past
+    its limit raises SIGBUS rather than an exception, so check up front."""
+    try:
+        stat = os.statvfs("/dev/shm")
+    except (AttributeError, OSError):
+        return True
+    return stat.f_bavail * stat.f_frsize >= nbytes
+
+
+def pack_shared_arrays(eval_examples):
+    """Copies the offsets and logits of all `eval_examples` into shared memory.
+  The arrays keep the dtypes of the inputs (promoted across features).
+  Args:
+    eval_examples: List of `EvalExample` with joined features and results.
+  Returns:
+    A tuple `(shm, layout, light_examples)`, where `light_examples` hold
+    `offset_span` / `logit_span` slices into the `SharedMemory` block `shm`
+    instead of the arrays and `layout` is the argument tuple of
+    `attach_shared_arrays` after the block name. The caller owns `shm`.
+    If the block cannot be allocated, returns `(None, None, eval_examples)`.
+  """
+    num_offsets, num_logits = 0, 0
+    offset_dtypes, logit_dtypes = {np.dtype(np.int32)}, {np.dtype(np.float32)}
+    for eval_example in eval_examples:
+        for feature in eval_example.features.values():
+            num_offsets += len(feature["wp_start_offset"])
+            offset_dtypes.add(np.asarray(feature["wp_start_offset"]).dtype)
+            offset_dtypes.add(np.asarray(feature["wp_end_offset"]).dtype)
+        for result in eval_example.results.values():
+            num_logits += len(result["start_logits"])
+            logit_dtypes.add(np.asarray(result["start_logits"]).dtype)
+            logit_dtypes.add(np.asarray(result["end_logits"]).dtype)
+    offset_dtype = reduce(np.promote_types, offset_dtypes).str
+    logit_dtype = reduce(np.promote_types, logit_dtypes).str
+    layout = (num_offsets, offset_dtype, num_logits, logit_dtype)
+
+    nbytes = max(1, 2 * (_aligned_nbytes(num_offsets, offset_dtype) +
+                         _aligned_nbytes(num_logits, logit_dtype)))
+    if not _shared_memory_fits(nbytes):
+        logger.warning("Not enough shared memory for %d bytes of offsets and "
+                       "logits, pickling them to the workers instead.", nbytes)
+        return None, None, eval_examples
+    try:
+        shm = SharedMemory(create=True, size=nbytes)
+    except OSError as e:
+        logger.warning("Could not allocate shared memory (%s), pickling offsets "
+                       "and logits to the workers instead.", e)
+        return None, None, eval_examples
+
+    try:
+        wp_start_offset, wp_end_offset, start_logits, end_logits = (
+            _shared_array_views(shm.buf, *layout))
+        light_examples = []
+        offset_pos, logit_pos = 0, 0
+        for eval_example in eval_examples:
+            light_example = EvalExample(eval_example.example_id, eval_example.candidates)
+            for unique_id, feature in eval_example.features.items():
+                end = offset_pos + len(feature["wp_start_offset"])
+                wp_start_offset[offset_pos:end] = feature["wp_start_offset"]
+                wp_end_offset[offset_pos:end] = feature["wp_end_offset"]
+                light_feature = {k: v for k, v in feature.items()
+                                 if k not in ("wp_start_offset", "wp_end_offset")}
+                light_feature["offset_span"] = (offset_pos, end)
+                light_example.features[unique_id] = light_feature
+                offset_pos = end
+            for unique_id, result in eval_example.results.items():
+                end = logit_pos + len(result["start_logits"])
+                start_logits[logit_pos:end] = result["start_logits"]
+                end_logits[logit_pos:end] = result["end_logits"]
+                light_result = {k: v for k, v in result.items()
+                                if k not in ("start_logits", "end_logits")}
+                light_result["logit_span"] = (logit_pos, end)
+                light_example.results[unique_id] = light_result
+                logit_pos = end
+            light_examples.append(light_example)
+        # Drop the local views so that `shm` can be closed.
+        del wp_start_offset, wp_end_offset, start_logits, end_logits
+    except BaseException:
+        wp_start_offset = wp_end_offset = start_logits = end_logits = None
+        shm.close()
+        shm.unlink()
+        raise
+    return shm, layout, light_examples
+
+
+def attach_shared_arrays(shm_name, num_offsets, offset_dtype, num_logits, logit_dtype):
+    """Pool initializer, attaches the worker to the block of `pack_shared_arrays`."""
+    global _shared_memory, _shared_arrays
+    _shared_memory = SharedMemory(name=shm_name)
+    _shared_arrays = _shared_array_views(
+        _shared_memory.buf, num_offsets, offset_dtype, num_logits, logit_dtype)
+
+
 # Construct prediction objects.
 def construct_prediction_object(eval_example, candidate_beam, max_answer_length):
+    if _shared_arrays is not None:
+        # Resolve the slices of a light example packed by `pack_shared_arrays`.
+        wp_start_offset, wp_end_offset, start_logits, end_logits = _shared_arrays
+        for feature in eval_example.features.values():
+            begin, end = feature.pop("offset_span")
+            feature["wp_start_offset"] = wp_start_offset[begin:end]
+            feature["wp_end_offset"] = wp_end_offset[begin:end]
+        for result in eval_example.results.values():
+            begin, end = result.pop("logit_span")
+            result["start_logits"] = start_logits[begin:end]
+            result["end_logits"] = end_logits[begin:end]
     summary = compute_predictions(eval_example, candidate_beam,
                                   max_answer_length)
     if summary is not None:
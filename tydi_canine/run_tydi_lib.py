@@ -513,11 +513,16 @@ class TyDiRunner(metaclass=abc.ABCMeta):
     def read_candidates(self, dev_jsonl_file):
         """Read candidates from an input pattern."""
         logger.info("Reading: %s", dev_jsonl_file)
+        with open(dev_jsonl_file, "rb") as input_file:
+            is_gzip = input_file.read(2) == b"\x1f\x8b"
+        if not is_gzip:
+            # Uncompressed files can be memory-mapped and parsed in parallel.
+            return postproc.read_candidates_from_file(dev_jsonl_file)
         candidates_dict = {}
         count = 0
         with gzip.GzipFile(dev_jsonl_file, "rb") as input_file:  # pytype: disable=wrong-arg-types
             for line in input_file:
-                json_dict = json.loads(line, object_pairs_hook=collections.OrderedDict)
+                json_dict = postproc.json_loads(line)
                 candidates_dict[json_dict["example_id"]] = json_dict["passage_answer_candidates"]
                 count += 1
         assert count == len(candidates_dict), f"load prediction candidates failed"